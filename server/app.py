@@ -8,13 +8,28 @@ import base64
 import os
 import numpy as np
 from datetime import datetime
-from utils.face_utils import get_face_encoding, compare_faces
+from utils.face_utils import get_face_encoding, compare_faces, ENCODING_SETTINGS
+from utils.frame_cache import FrameCache
+from utils import auth_engine
+from utils import access_policy
+from utils.profiling import SamplingProfiler, SlowAttemptRecorder
 from werkzeug.security import generate_password_hash, check_password_hash
 
 app = Flask(__name__)
 app.secret_key = 'supersecretkey'  
 # === Настройки ===
 os.makedirs("registered_faces", exist_ok=True)
+# Политика проверки: "both", "either" или "face-only"
+AUTH_POLICY = os.environ.get("AUTH_POLICY", auth_engine.POLICY_FACE_ONLY)
+auth_engine.check_policy(AUTH_POLICY)
+# Кэш кодировок для повторных и почти одинаковых кадров
+FRAME_CACHE_DISTANCE = os.environ.get("FRAME_CACHE_DISTANCE")
+frame_cache = FrameCache(
+    max_size=int(os.environ.get("FRAME_CACHE_SIZE", 256)),
+    ttl=float(os.environ.get("FRAME_CACHE_TTL", 5)),
+    max_distance=int(FRAME_CACHE_DISTANCE) if FRAME_CACHE_DISTANCE else None,
+    settings=dict(ENCODING_SETTINGS),
+)
 
 # === Инициализация БД ===
 def init_db():
@@ -39,6 +54,8 @@ def init_db():
         status TEXT,
         timestamp TEXT
     )''')
+    # Права доступа, двери и временные окна
+    access_policy.init_tables(c)
     # Создаём админа по умолчанию (если его нет)
     admin_login = "admin"
     c.execute("SELECT * FROM users WHERE login=?", (admin_login,))
@@ -53,6 +70,21 @@ def init_db():
 
 init_db()
 
+# Проверка прав по дверям и расписанию (ACCESS_CONTROL=1); индекс строится при первой попытке
+ACCESS_CONTROL = os.environ.get("ACCESS_CONTROL") == "1"
+DEFAULT_DOOR = os.environ.get("DEFAULT_DOOR", "main")
+access_index = access_policy.AccessIndex('database.db') if ACCESS_CONTROL else None
+
+# Профилирование: сэмплирующий профилировщик по запросу администратора и запись
+# медленных попыток (только если задан SLOW_ATTEMPT_MS — снимки содержат фото лиц)
+profiler = SamplingProfiler()
+SLOW_ATTEMPT_MS = os.environ.get("SLOW_ATTEMPT_MS")
+slow_attempts = SlowAttemptRecorder(
+    os.environ.get("SLOW_ATTEMPT_DIR", "slow_attempts"),
+    float(SLOW_ATTEMPT_MS) / 1000 if SLOW_ATTEMPT_MS else None,
+    max_captures=int(os.environ.get("SLOW_ATTEMPT_MAX", 50)),
+)
+
 # === Глобальные переменные ===
 current_attempt = {"user_id": None, "status": None, "timestamp": None}
 
@@ -65,43 +97,87 @@ def on_message(client, userdata, msg):
     global current_attempt
 
     if msg.topic == "auth/attempts":
+        trace = slow_attempts.start()
+        user_id = None
+        photo_data = None
         try:
             data = json.loads(msg.payload.decode())
             user_id = data.get("user_id")
             photo_b64 = data.get("photo")
+            trace.mark("parse")
+
+            # Права проверяются до декодирования фото и распознавания
+            if access_index is not None:
+                access_index.refresh_if_stale()
+                door_id = data.get("door", DEFAULT_DOOR)
+                direction = data.get("direction", access_policy.RIGHTS_ENTRY)
+                if not access_index.authorize(user_id, door_id, direction):
+                    log_and_publish(client, user_id, "failed", f"Нет прав доступа ({door_id})")
+                    return
+                trace.mark("access")
+
             photo_data = base64.b64decode(photo_b64)
 
             # Сохраняем фото временно
             temp_path = f"registered_faces/{user_id}_latest.jpg"
             with open(temp_path, "wb") as f:
                 f.write(photo_data)
+            trace.mark("save_photo")
 
             # Проверяем, зарегистрирован ли пользователь
             conn = sqlite3.connect('database.db')
             conn.row_factory = sqlite3.Row
             c = conn.cursor()
-            c.execute("SELECT face_encoding FROM users WHERE user_id = ?", (user_id,))
+            c.execute("SELECT face_encoding, fingerprint_template FROM users WHERE user_id = ?", (user_id,))
             row = c.fetchone()
             conn.close()
+            trace.mark("db")
 
             if not row:
                 log_and_publish(client, user_id, "failed", "Пользователь не зарегистрирован")
                 return
 
-            known_encoding = np.frombuffer(row['face_encoding'], dtype=np.float64)
-            current_encoding = get_face_encoding(photo_data)
-
-            if current_encoding is None:
-                log_and_publish(client, user_id, "failed", "Лицо не обнаружено")
-                return
-
-            if compare_faces(known_encoding, current_encoding):
-                log_and_publish(client, user_id, "success", "Доступ разрешён")
+            def face_check():
+                # У пользователей, зарегистрированных через сайт, лица может не быть
+                if row['face_encoding'] is None:
+                    print(f"{user_id}: лицо не зарегистрировано")
+                    return False
+                known_encoding = np.frombuffer(row['face_encoding'], dtype=np.float64)
+                with trace.stage("face_encoding"):
+                    current_encoding = frame_cache.get_or_compute(
+                        photo_data, get_face_encoding, dict(ENCODING_SETTINGS), scope=user_id
+                    )
+                if current_encoding is None:
+                    print(f"{user_id}: лицо не обнаружено")
+                    return False
+                with trace.stage("compare_faces"):
+                    return compare_faces(known_encoding, current_encoding)
+
+            fingerprint_check = None
+            fingerprint_b64 = data.get("fingerprint")
+            if fingerprint_b64 and AUTH_POLICY != auth_engine.POLICY_FACE_ONLY:
+                fingerprint_data = base64.b64decode(fingerprint_b64)
+                known_template = row['fingerprint_template']
+
+                def fingerprint_check():
+                    with trace.stage("fingerprint"):
+                        return auth_engine.compare_fingerprints(known_template, fingerprint_data)
+
+            passed, reason = auth_engine.evaluate(AUTH_POLICY, face_check, fingerprint_check)
+            trace.mark("decision")
+            if passed:
+                log_and_publish(client, user_id, "success", f"Доступ разрешён ({reason})")
             else:
-                log_and_publish(client, user_id, "failed", "Лицо не совпало")
+                log_and_publish(client, user_id, "failed", reason)
         except Exception as e:
             print("Ошибка:", e)
             log_and_publish(client, "unknown", "failed", "Ошибка обработки")
+        finally:
+            # Запись медленной попытки не должна ронять поток MQTT
+            try:
+                slow_attempts.finish(trace, photo_data, user_id)
+            except Exception as e:
+                print("Ошибка записи медленной попытки:", e)
 
 def log_and_publish(client, user_id, status, reason=""):
     global current_attempt
@@ -119,16 +195,16 @@ def log_and_publish(client, user_id, status, reason=""):
     client.publish("auth/response", "success" if status == "success" else "failed")
     print(f"{user_id}: {status.upper()} — {reason}")
 
+MQTT_HOST = os.environ.get("MQTT_HOST", "192.168.1.100")
+MQTT_PORT = int(os.environ.get("MQTT_PORT", 1883))
+
 mqtt_client = mqtt.Client()
 mqtt_client.on_connect = on_connect
 mqtt_client.on_message = on_message
-mqtt_client.connect("192.168.1.100", 1883, 60)
 
 def start_mqtt():
     mqtt_client.loop_forever()
 
-threading.Thread(target=start_mqtt, daemon=True).start()
-
 # === Маршруты ===
 
 @app.route('/login', methods=['GET', 'POST'])
@@ -215,5 +291,35 @@ def api_status():
         return jsonify({"error": "Unauthorized"}), 401
     return jsonify(current_attempt)
 
+@app.route('/api/cache_stats')
+def api_cache_stats():
+    if not session.get('logged_in'):
+        return jsonify({"error": "Unauthorized"}), 401
+    return jsonify(frame_cache.stats())
+
+def is_admin():
+    return session.get('logged_in') and session.get('user_id') == 'admin'
+
+@app.route('/admin/profile', methods=['POST'])
+def admin_profile_start():
+    if not is_admin():
+        return jsonify({"error": "Forbidden"}), 403
+    seconds = min(max(request.form.get('seconds', 10, type=float), 1), 120)
+    if not profiler.start(seconds):
+        return jsonify({"error": "Профилировщик уже запущен"}), 409
+    return jsonify({"status": "started", "seconds": seconds})
+
+@app.route('/admin/profile')
+def admin_profile_result():
+    if not is_admin():
+        return jsonify({"error": "Forbidden"}), 403
+    if profiler.running:
+        return jsonify({"status": "running", "started_at": str(profiler.started_at)}), 202
+    # Свёрнутые стеки: flamegraph.pl profile.txt > profile.svg или speedscope
+    return profiler.collapsed(), 200, {'Content-Type': 'text/plain; charset=utf-8'}
+
 if __name__ == '__main__':
+    # MQTT-поток запускается только здесь, чтобы async_app.py мог импортировать модуль
+    mqtt_client.connect(MQTT_HOST, MQTT_PORT, 60)
+    threading.Thread(target=start_mqtt, daemon=True).start()
     app.run(host='0.0.0.0', port=5000, debug=False)
@@ -0,0 +1,167 @@
+"""
+Асинхронный режим сервера: asyncio + неблокирующий MQTT-клиент + ASGI.
+
+Маршруты и обработка попыток берутся из app.py без изменений:
+- Flask-приложение отдаётся через ASGI-обёртку (uvicorn), запросы — в пуле потоков;
+- сообщения MQTT читает aiomqtt, а распознавание лица (CPU) выполняется
+  в пуле потоков через run_in_executor;
+- при SIGINT/SIGTERM новые попытки не принимаются, начатые дорабатываются.
+
+Запуск из каталога server:
+    pip install aiomqtt uvicorn asgiref
+    python async_app.py
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import aiomqtt
+import uvicorn
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+
+import app as flask_app
+
+HTTP_HOST = os.environ.get("HTTP_HOST", "0.0.0.0")
+HTTP_PORT = int(os.environ.get("HTTP_PORT", 5000))
+# Сколько попыток распознаётся одновременно; остальные ждут в очереди
+WORKERS = int(os.environ.get("RECOGNITION_WORKERS", os.cpu_count() or 2))
+# Потоки для Flask-маршрутов (аналог потока на запрос у app.run(), но с верхней границей)
+HTTP_WORKERS = int(os.environ.get("HTTP_WORKERS", 32))
+RECONNECT_DELAY = 5
+DRAIN_TIMEOUT = 30
+
+
+class PublishBridge:
+    """Даёт on_message из app.py привычный client.publish() поверх aiomqtt."""
+
+    def __init__(self, client, loop):
+        self.client = client
+        self.loop = loop
+
+    def publish(self, topic, payload):
+        # Вызывается из потока пула: отправка выполняется в цикле событий
+        future = asyncio.run_coroutine_threadsafe(self.client.publish(topic, payload), self.loop)
+        return future.result(timeout=10)
+
+
+class _PooledWsgiInstance(WsgiToAsgiInstance):
+    def __init__(self, wsgi_application, executor):
+        super().__init__(wsgi_application)
+        self.executor = executor
+
+    async def run_wsgi_app(self, body):
+        run = WsgiToAsgiInstance.__dict__["run_wsgi_app"].func
+        await sync_to_async(run, thread_sensitive=False, executor=self.executor)(self, body)
+
+
+class PooledWsgiToAsgi(WsgiToAsgi):
+    """
+    WsgiToAsgi, выполняющий запросы в пуле потоков.
+
+    Штатный WsgiToAsgi вызывает WSGI-приложение через sync_to_async с
+    thread_sensitive=True, то есть все запросы идут по очереди в одном потоке.
+    """
+
+    def __init__(self, wsgi_application, executor):
+        super().__init__(wsgi_application)
+        self.executor = executor
+
+    async def __call__(self, scope, receive, send):
+        await _PooledWsgiInstance(self.wsgi_application, self.executor)(scope, receive, send)
+
+
+class AsyncServer:
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="recognition")
+        self.http_executor = ThreadPoolExecutor(max_workers=HTTP_WORKERS, thread_name_prefix="http")
+        self.slots = asyncio.Semaphore(WORKERS * 2)
+        self.tasks = set()
+        self.stopping = asyncio.Event()
+
+    async def handle_message(self, bridge, message):
+        msg = SimpleNamespace(topic=str(message.topic), payload=message.payload)
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(self.executor, flask_app.on_message, bridge, None, msg)
+        finally:
+            self.slots.release()
+
+    async def consume(self, client, bridge):
+        async for message in client.messages:
+            # Ограничиваем число задач в работе, чтобы не копить кадры в памяти
+            await self.slots.acquire()
+            task = asyncio.create_task(self.handle_message(bridge, message))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def run_mqtt(self):
+        loop = asyncio.get_running_loop()
+        while not self.stopping.is_set():
+            try:
+                async with aiomqtt.Client(flask_app.MQTT_HOST, flask_app.MQTT_PORT) as client:
+                    print("MQTT подключён (async)")
+                    await client.subscribe("auth/attempts")
+                    bridge = PublishBridge(client, loop)
+                    consumer = asyncio.create_task(self.consume(client, bridge))
+                    stop = asyncio.create_task(self.stopping.wait())
+                    try:
+                        await asyncio.wait({consumer, stop}, return_when=asyncio.FIRST_COMPLETED)
+                    finally:
+                        stop.cancel()
+                    if consumer.done():
+                        consumer.result()  # MqttError -> переподключение
+                        continue
+
+                    # Останов: прекращаем приём, но дорабатываем попытки при живом соединении,
+                    # чтобы двери получили ответ; отключение — при выходе из async with
+                    consumer.cancel()
+                    try:
+                        await consumer
+                    except asyncio.CancelledError:
+                        pass
+                    try:
+                        await client.unsubscribe("auth/attempts")
+                    except aiomqtt.MqttError:
+                        pass
+                    await self.drain()
+            except aiomqtt.MqttError as e:
+                print("MQTT отключён:", e)
+                try:
+                    await asyncio.wait_for(self.stopping.wait(), RECONNECT_DELAY)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def drain(self):
+        """Ждёт завершения начатых попыток (не дольше DRAIN_TIMEOUT)."""
+        if self.tasks:
+            print(f"Завершение {len(self.tasks)} попыток...")
+            await asyncio.wait(self.tasks, timeout=DRAIN_TIMEOUT)
+
+    async def shutdown(self, mqtt_task):
+        self.stopping.set()
+        await mqtt_task
+        # Если MQTT был отключён в момент останова, попытки дорабатываются здесь
+        await self.drain()
+        self.executor.shutdown(wait=False)
+        self.http_executor.shutdown(wait=False)
+
+    async def serve(self):
+        asgi_app = PooledWsgiToAsgi(flask_app.app, self.http_executor)
+        config = uvicorn.Config(asgi_app, host=HTTP_HOST, port=HTTP_PORT, log_level="info")
+        server = uvicorn.Server(config)
+        mqtt_task = asyncio.create_task(self.run_mqtt())
+
+        # uvicorn сам ловит SIGINT/SIGTERM и возвращается из serve()
+        await server.serve()
+        await self.shutdown(mqtt_task)
+
+
+def main():
+    asyncio.run(AsyncServer().serve())
+
+
+if __name__ == '__main__':
+    main()
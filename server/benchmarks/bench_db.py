@@ -0,0 +1,93 @@
+import os
+import random
+import sqlite3
+import tempfile
+
+from benchmarks.bench_utils import measure
+
+ROW_COUNTS = [1_000, 10_000, 100_000, 1_000_000]
+
+# Схема таблиц — как в app.init_db
+USERS_SQL = '''CREATE TABLE users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT UNIQUE NOT NULL,
+    name TEXT NOT NULL,
+    login TEXT UNIQUE NOT NULL,
+    password_hash TEXT NOT NULL,
+    photo_path TEXT,
+    fingerprint_template BLOB,
+    face_encoding BLOB,
+    registered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)'''
+LOGS_SQL = '''CREATE TABLE logs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT,
+    status TEXT,
+    timestamp TEXT
+)'''
+
+
+def build_db(path, rows, seed=0):
+    """Синтетическая база: rows пользователей (галерея) и rows записей журнала."""
+    rnd = random.Random(seed)
+    encoding = bytes(128 * 8)
+    template = bytes(512)
+    conn = sqlite3.connect(path)
+    c = conn.cursor()
+    c.execute(USERS_SQL)
+    c.execute(LOGS_SQL)
+    c.executemany(
+        "INSERT INTO users (user_id, name, login, password_hash, fingerprint_template, face_encoding) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        ((f"user{i}", f"User {i}", f"login{i}", "hash", template, encoding) for i in range(rows))
+    )
+    c.executemany(
+        "INSERT INTO logs (user_id, status, timestamp) VALUES (?, ?, ?)",
+        ((f"user{rnd.randrange(rows)}", rnd.choice(("success", "failed")),
+          f"{rnd.randrange(24):02d}:{rnd.randrange(60):02d}:{rnd.randrange(60):02d}")
+         for _ in range(rows))
+    )
+    conn.commit()
+    conn.close()
+
+
+def run(row_counts=ROW_COUNTS, repeat=3):
+    results = {}
+    for rows in row_counts:
+        fd, path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        try:
+            build_db(path, rows)
+            rnd = random.Random(rows)
+
+            # Запросы выполняются так же, как в app.py: новое соединение на каждый вызов
+            def lookup_user():
+                conn = sqlite3.connect(path)
+                conn.execute("SELECT face_encoding, fingerprint_template FROM users WHERE user_id = ?",
+                             (f"user{rnd.randrange(rows)}",)).fetchone()
+                conn.close()
+
+            def lookup_login():
+                conn = sqlite3.connect(path)
+                conn.execute("SELECT * FROM users WHERE login = ?", (f"login{rnd.randrange(rows)}",)).fetchone()
+                conn.close()
+
+            def recent_logs():
+                conn = sqlite3.connect(path)
+                conn.execute("SELECT * FROM logs ORDER BY timestamp DESC LIMIT 50").fetchall()
+                conn.close()
+
+            def insert_log():
+                conn = sqlite3.connect(path)
+                conn.execute("INSERT INTO logs (user_id, status, timestamp) VALUES (?, ?, ?)",
+                             ("bench", "success", "12:00:00"))
+                conn.commit()
+                conn.close()
+
+            results[f"db.lookup_user[{rows}]"] = measure(lookup_user, repeat=repeat)
+            results[f"db.lookup_login[{rows}]"] = measure(lookup_login, repeat=repeat)
+            results[f"db.recent_logs[{rows}]"] = measure(recent_logs, repeat=repeat, number=5)
+            results[f"db.insert_log[{rows}]"] = measure(insert_log, repeat=repeat, number=20)
+        finally:
+            os.remove(path)
+    return results
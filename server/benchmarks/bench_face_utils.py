@@ -0,0 +1,61 @@
+import os
+
+import cv2
+import numpy as np
+
+from benchmarks.bench_utils import measure
+from utils.face_utils import get_face_encoding, compare_faces
+
+# Разрешения кадров ESP32-CAM: QQVGA, QVGA, VGA, SVGA, UXGA
+RESOLUTIONS = [(160, 120), (320, 240), (640, 480), (800, 600), (1600, 1200)]
+
+# Портрет астронавта NASA (общественное достояние, skimage.data.astronaut), кадр 320x320
+FACE_FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "face.jpg")
+
+
+def make_face_image(width, height):
+    """JPEG с лицом: образец масштабируется по высоте кадра и дополняется серым по бокам."""
+    face = cv2.imread(FACE_FIXTURE)
+    size = min(width, height)
+    face = cv2.resize(face, (size, size), interpolation=cv2.INTER_AREA)
+    img = np.full((height, width, 3), 128, dtype=np.uint8)
+    x = (width - size) // 2
+    y = (height - size) // 2
+    img[y:y + size, x:x + size] = face
+    _, buffer = cv2.imencode('.jpg', img, [cv2.IMWRITE_JPEG_QUALITY, 90])
+    return buffer.tobytes()
+
+
+def make_no_face_image(width, height, seed=0):
+    """JPEG со случайным шумом и эллипсом — детектор отрабатывает, кодировка не строится."""
+    rng = np.random.default_rng(seed)
+    img = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+    center = (width // 2, height // 2)
+    axes = (width // 6, height // 4)
+    cv2.ellipse(img, center, axes, 0, 0, 360, (180, 160, 140), -1)
+    _, buffer = cv2.imencode('.jpg', img, [cv2.IMWRITE_JPEG_QUALITY, 90])
+    return buffer.tobytes()
+
+
+def run(repeat=3):
+    results = {}
+    for width, height in RESOLUTIONS:
+        face_data = make_face_image(width, height)
+        # Без найденного лица замер не покрывает построение кодировки — такой результат не пишем
+        if get_face_encoding(face_data) is None:
+            print(f"ВНИМАНИЕ: лицо не найдено в кадре {width}x{height}, замер с лицом пропущен")
+        else:
+            results[f"get_face_encoding[face,{width}x{height}]"] = measure(
+                lambda: get_face_encoding(face_data), repeat=repeat, number=3
+            )
+
+        no_face_data = make_no_face_image(width, height)
+        results[f"get_face_encoding[no_face,{width}x{height}]"] = measure(
+            lambda: get_face_encoding(no_face_data), repeat=repeat, number=3
+        )
+
+    rng = np.random.default_rng(1)
+    known = rng.random(128)
+    unknown = rng.random(128)
+    results["compare_faces"] = measure(lambda: compare_faces(known, unknown), repeat=repeat)
+    return results
@@ -0,0 +1,51 @@
+import json
+import os
+import time
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def measure(func, repeat=5, number=None, min_time=0.2):
+    """
+    Возвращает лучшее среднее время одного вызова func (в секундах).
+    Если number не задан, подбирается так, чтобы серия шла не меньше min_time.
+    """
+    if number is None:
+        number = 1
+        while True:
+            start = time.perf_counter()
+            for _ in range(number):
+                func()
+            if time.perf_counter() - start >= min_time or number >= 1_000_000:
+                break
+            number *= 10
+
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def load_baseline(path=BASELINE_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_baseline(results, path=BASELINE_PATH):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+
+def find_regressions(results, baseline, threshold=0.2):
+    """Список (имя, было, стало) для замеров, ставших медленнее более чем на threshold."""
+    regressions = []
+    for name, value in sorted(results.items()):
+        old = baseline.get(name)
+        if old and value > old * (1 + threshold):
+            regressions.append((name, old, value))
+    return regressions
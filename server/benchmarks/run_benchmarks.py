@@ -0,0 +1,59 @@
+"""
+Микробенчмарки горячих путей: face_utils и запросы к БД.
+
+Запуск из каталога server:
+    python -m benchmarks.run_benchmarks --save       # записать baseline.json
+    python -m benchmarks.run_benchmarks              # сравнить с baseline.json
+"""
+
+import argparse
+import sys
+
+from benchmarks import bench_db
+from benchmarks.bench_utils import load_baseline, save_baseline, find_regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарки face_utils и БД")
+    parser.add_argument("--save", action="store_true", help="сохранить результаты как baseline")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="допустимое замедление относительно baseline (0.2 = 20%%)")
+    parser.add_argument("--max-rows", type=int, default=bench_db.ROW_COUNTS[-1],
+                        help="максимальный размер синтетических таблиц")
+    parser.add_argument("--skip-face", action="store_true", help="не запускать бенчмарки face_utils")
+    parser.add_argument("--skip-db", action="store_true", help="не запускать бенчмарки БД")
+    args = parser.parse_args(argv)
+
+    results = {}
+    if not args.skip_face:
+        from benchmarks import bench_face_utils
+        results.update(bench_face_utils.run())
+    if not args.skip_db:
+        results.update(bench_db.run([n for n in bench_db.ROW_COUNTS if n <= args.max_rows]))
+
+    for name, value in sorted(results.items()):
+        print(f"{name:45s} {value * 1000:10.3f} мс")
+
+    if args.save:
+        baseline = load_baseline()
+        baseline.update(results)
+        save_baseline(baseline)
+        print("Baseline сохранён")
+        return 0
+
+    baseline = load_baseline()
+    if not baseline:
+        print("Baseline не найден: сравнивать не с чем, запустите с --save")
+        return 1
+    missing = sorted(set(results) - set(baseline))
+    if missing:
+        print("Нет в baseline (не сравнивались):", ", ".join(missing))
+
+    regressions = find_regressions(results, baseline, args.threshold)
+    for name, old, new in regressions:
+        print(f"РЕГРЕССИЯ {name}: {old * 1000:.3f} мс -> {new * 1000:.3f} мс")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
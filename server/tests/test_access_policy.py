@@ -0,0 +1,176 @@
+import os
+import sys
+import sqlite3
+import pytest
+from datetime import datetime
+
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import access_policy
+from utils.access_policy import AccessIndex, init_tables
+
+
+MONDAY_NOON = datetime(2026, 10, 19, 12, 0)
+MONDAY_NIGHT = datetime(2026, 10, 19, 23, 30)
+SUNDAY_NOON = datetime(2026, 10, 25, 12, 0)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "access.db")
+    conn = sqlite3.connect(path)
+    c = conn.cursor()
+    init_tables(c)
+    c.execute("INSERT INTO doors (door_id, name) VALUES ('main', 'Главный вход')")
+    c.execute("INSERT INTO access_rights (user_id, door_id, rights) VALUES ('alice', 'main', 'entry_exit')")
+    c.execute("INSERT INTO access_rights (user_id, door_id, rights) VALUES ('bob', 'main', 'entry')")
+    conn.commit()
+    conn.close()
+    return path
+
+
+def execute(path, sql, params=()):
+    conn = sqlite3.connect(path)
+    conn.execute(sql, params)
+    conn.commit()
+    conn.close()
+
+
+
+def test_rights_by_direction(db_path):
+    index = AccessIndex(db_path)
+    index.rebuild()
+
+    assert index.authorize("alice", "main", "entry") is True
+    assert index.authorize("alice", "main", "exit") is True
+    assert index.authorize("bob", "main", "entry") is True
+    assert index.authorize("bob", "main", "exit") is False
+    assert index.authorize("carol", "main") is False
+    assert index.authorize("alice", "lab") is False
+
+
+def test_time_windows(db_path):
+    execute(db_path, "INSERT INTO access_windows (right_id, weekdays, start_time, end_time) "
+                     "SELECT id, '01234', '08:00', '18:00' FROM access_rights WHERE user_id = 'bob'")
+    index = AccessIndex(db_path)
+    index.rebuild()
+
+    assert index.authorize("bob", "main", now=MONDAY_NOON) is True
+    assert index.authorize("bob", "main", now=MONDAY_NIGHT) is False
+    assert index.authorize("bob", "main", now=SUNDAY_NOON) is False
+    assert index.authorize("alice", "main", now=SUNDAY_NOON) is True
+
+
+def test_window_across_midnight(db_path):
+    execute(db_path, "INSERT INTO access_windows (right_id, start_time, end_time) "
+                     "SELECT id, '22:00', '06:00' FROM access_rights WHERE user_id = 'bob'")
+    index = AccessIndex(db_path)
+    index.rebuild()
+
+    assert index.authorize("bob", "main", now=MONDAY_NIGHT) is True
+    assert index.authorize("bob", "main", now=MONDAY_NOON) is False
+
+
+def test_incremental_refresh(db_path):
+    index = AccessIndex(db_path)
+    index.rebuild()
+
+    execute(db_path, "INSERT INTO access_rights (user_id, door_id) VALUES ('carol', 'main')")
+    execute(db_path, "DELETE FROM access_rights WHERE user_id = 'bob'")
+    execute(db_path, "UPDATE access_rights SET rights = 'entry' WHERE user_id = 'alice'")
+    index.refresh()
+
+    assert index.authorize("carol", "main") is True
+    assert index.authorize("bob", "main") is False
+    assert index.authorize("alice", "main", "exit") is False
+
+
+def test_door_changes_refresh_rules(db_path):
+    execute(db_path, "INSERT INTO access_rights (user_id, door_id) VALUES ('alice', 'lab')")
+    index = AccessIndex(db_path)
+    index.rebuild()
+    assert index.authorize("alice", "lab") is False
+
+    execute(db_path, "INSERT INTO doors (door_id) VALUES ('lab')")
+    execute(db_path, "DELETE FROM doors WHERE door_id = 'main'")
+    index.refresh()
+
+    assert index.authorize("alice", "lab") is True
+    assert index.authorize("alice", "main") is False
+
+
+def test_refresh_if_stale_respects_interval(db_path):
+    index = AccessIndex(db_path, refresh_interval=60)
+    index.refresh_if_stale()
+    execute(db_path, "INSERT INTO access_rights (user_id, door_id) VALUES ('carol', 'main')")
+    index.refresh_if_stale()
+
+    assert index.authorize("carol", "main") is False
+
+
+def test_moved_right_revoked_from_old_user(db_path):
+    index = AccessIndex(db_path)
+    index.rebuild()
+
+    execute(db_path, "UPDATE access_rights SET user_id = 'carol' WHERE user_id = 'bob'")
+    index.refresh()
+
+    assert index.authorize("bob", "main") is False
+    assert index.authorize("carol", "main") is True
+
+
+def test_moved_window_refreshes_both_rights(db_path):
+    execute(db_path, "INSERT INTO access_windows (right_id, weekdays, start_time, end_time) "
+                     "SELECT id, '01234', '08:00', '18:00' FROM access_rights WHERE user_id = 'bob'")
+    index = AccessIndex(db_path)
+    index.rebuild()
+    assert index.authorize("bob", "main", now=SUNDAY_NOON) is False
+
+    execute(db_path, "UPDATE access_windows SET right_id = "
+                     "(SELECT id FROM access_rights WHERE user_id = 'alice')")
+    index.refresh()
+
+    assert index.authorize("bob", "main", now=SUNDAY_NOON) is True
+    assert index.authorize("alice", "main", now=SUNDAY_NOON) is False
+
+
+def test_refresh_prunes_only_old_changes(db_path):
+    index = AccessIndex(db_path)
+    index.rebuild()
+    execute(db_path, "INSERT INTO access_changes (user_id, door_id, changed_at) "
+                     "VALUES ('old', 'main', datetime('now', '-2 days'))")
+    execute(db_path, "INSERT INTO access_rights (user_id, door_id) VALUES ('carol', 'main')")
+    index.refresh()
+
+    conn = sqlite3.connect(db_path)
+    users = [row[0] for row in conn.execute("SELECT user_id FROM access_changes")]
+    conn.close()
+    assert "old" not in users
+    assert "carol" in users
+
+
+def test_indexes_in_several_processes_see_same_changes(db_path):
+    first = AccessIndex(db_path)
+    second = AccessIndex(db_path)
+    first.rebuild()
+    second.rebuild()
+
+    execute(db_path, "DELETE FROM access_rights WHERE user_id = 'bob'")
+    first.refresh()
+    second.refresh()
+
+    assert first.authorize("bob", "main") is False
+    assert second.authorize("bob", "main") is False
+
+
+def test_long_idle_index_rebuilds(db_path, monkeypatch):
+    index = AccessIndex(db_path)
+    index.rebuild()
+    execute(db_path, "DELETE FROM access_rights WHERE user_id = 'bob'")
+    # Изменение уже удалено из журнала, пока индекс простаивал
+    execute(db_path, "DELETE FROM access_changes")
+    monkeypatch.setattr(index, "_last_refresh", index._last_refresh - access_policy.CHANGES_RETENTION)
+    index.refresh()
+
+    assert index.authorize("bob", "main") is False
@@ -0,0 +1,157 @@
+import os
+import sys
+import asyncio
+import threading
+import pytest
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch, MagicMock, AsyncMock
+
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+pytest.importorskip("aiomqtt")
+pytest.importorskip("uvicorn")
+
+import async_app
+
+
+
+def test_publish_bridge_runs_on_event_loop():
+    async def scenario():
+        client = MagicMock()
+        client.publish = AsyncMock()
+        bridge = async_app.PublishBridge(client, asyncio.get_running_loop())
+        await asyncio.get_running_loop().run_in_executor(None, bridge.publish, "auth/response", "success")
+        client.publish.assert_awaited_once_with("auth/response", "success")
+
+    asyncio.run(scenario())
+
+
+@patch('async_app.flask_app.on_message')
+def test_handle_message_runs_in_executor(mock_on_message):
+    async def scenario():
+        server = async_app.AsyncServer()
+        await server.slots.acquire()
+        message = MagicMock()
+        message.topic = "auth/attempts"
+        message.payload = b"{}"
+        bridge = MagicMock()
+
+        await server.handle_message(bridge, message)
+
+        mock_on_message.assert_called_once()
+        client, userdata, msg = mock_on_message.call_args[0]
+        assert client is bridge
+        assert msg.topic == "auth/attempts"
+        assert msg.payload == b"{}"
+        await server.drain()
+
+    asyncio.run(scenario())
+
+
+class FakeMqttClient:
+    """Минимальный aiomqtt.Client: публикация после отключения падает, как у настоящего."""
+
+    def __init__(self):
+        self.connected = False
+        self.unsubscribed = False
+        self.published = []
+        self.queue = asyncio.Queue()
+
+    async def __aenter__(self):
+        self.connected = True
+        return self
+
+    async def __aexit__(self, *exc):
+        self.connected = False
+
+    async def subscribe(self, topic):
+        pass
+
+    async def unsubscribe(self, topic):
+        self.unsubscribed = True
+
+    async def publish(self, topic, payload):
+        if not self.connected:
+            raise async_app.aiomqtt.MqttError("client is closed")
+        self.published.append((topic, payload))
+
+    @property
+    def messages(self):
+        return self._messages()
+
+    async def _messages(self):
+        while True:
+            yield await self.queue.get()
+
+
+def test_shutdown_drains_attempts_before_disconnect():
+    started, release = threading.Event(), threading.Event()
+
+    def slow_on_message(client, userdata, msg):
+        started.set()
+        release.wait(5)
+        client.publish("auth/response", "success")
+
+    async def scenario():
+        fake = FakeMqttClient()
+        loop = asyncio.get_running_loop()
+        with patch('async_app.aiomqtt.Client', return_value=fake), \
+                patch('async_app.flask_app.on_message', side_effect=slow_on_message):
+            server = async_app.AsyncServer()
+            mqtt_task = asyncio.create_task(server.run_mqtt())
+            await fake.queue.put(SimpleNamespace(topic="auth/attempts", payload=b"{}"))
+            assert await loop.run_in_executor(None, started.wait, 5)
+
+            shutdown = asyncio.create_task(server.shutdown(mqtt_task))
+            await asyncio.sleep(0.05)
+            # Попытка ещё идёт: останов ждёт её, соединение открыто, приём прекращён
+            assert not shutdown.done()
+            assert fake.connected
+            assert fake.unsubscribed
+
+            release.set()
+            await asyncio.wait_for(shutdown, 5)
+
+        assert fake.published == [("auth/response", "success")]
+        assert not fake.connected
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        release.set()
+
+
+def test_wsgi_requests_run_concurrently():
+    # Оба запроса проходят барьер, только если выполняются одновременно
+    barrier = threading.Barrier(2, timeout=5)
+
+    def slow_wsgi_app(environ, start_response):
+        barrier.wait()
+        start_response("200 OK", [("Content-Type", "text/plain")])
+        return [b"ok"]
+
+    async def request(asgi_app):
+        scope = {"type": "http", "method": "GET", "path": "/api/status", "query_string": b"",
+                 "headers": [], "http_version": "1.1", "scheme": "http", "server": ("test", 80)}
+        sent = []
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            sent.append(message)
+
+        await asgi_app(scope, receive, send)
+        return sent[0]["status"]
+
+    async def scenario():
+        executor = ThreadPoolExecutor(max_workers=4)
+        try:
+            asgi_app = async_app.PooledWsgiToAsgi(slow_wsgi_app, executor)
+            return await asyncio.gather(request(asgi_app), request(asgi_app))
+        finally:
+            executor.shutdown(wait=False)
+
+    assert asyncio.run(scenario()) == [200, 200]
@@ -0,0 +1,124 @@
+import os
+import sys
+import threading
+import pytest
+from unittest.mock import MagicMock
+
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import auth_engine
+from utils.auth_engine import evaluate, compare_fingerprints, check_policy
+
+
+
+def blocked(result, started, release):
+    """Фактор, который сообщает о старте и ждёт release."""
+    def check():
+        started.set()
+        release.wait(5)
+        return result
+    return check
+
+
+@pytest.fixture
+def scored_fingerprints(monkeypatch):
+    monkeypatch.setattr(auth_engine, "FINGERPRINT_MATCH_SCORED", True)
+
+
+def test_compare_fingerprints():
+    assert compare_fingerprints(b"\x01\x02", b"\x01\x02") is True
+    assert compare_fingerprints(b"\x01\x02", b"\x01\x03") is False
+    assert compare_fingerprints(None, b"\x01") is False
+
+
+def test_both_policy_success():
+    passed, _ = evaluate("both", lambda: True, lambda: True)
+    assert passed is True
+
+
+def test_both_policy_requires_fingerprint():
+    passed, _ = evaluate("both", lambda: True)
+    assert passed is False
+
+
+def test_both_policy_skips_face_when_fingerprint_fails():
+    face_check = MagicMock(return_value=True)
+    passed, reason = evaluate("both", face_check, lambda: False)
+    assert passed is False
+    assert "fingerprint" in reason
+    face_check.assert_not_called()
+
+
+def test_both_policy_checks_face_after_fingerprint():
+    passed, reason = evaluate("both", lambda: False, lambda: True)
+    assert passed is False
+    assert "face" in reason
+
+
+def test_both_policy_short_circuits_on_failure_with_scored_matcher(scored_fingerprints):
+    started, release = threading.Event(), threading.Event()
+    try:
+        passed, reason = evaluate("both", blocked(True, started, release), lambda: False)
+        assert passed is False
+        assert "fingerprint" in reason
+        # evaluate вернулся, пока проверка лица ещё заблокирована
+        assert not release.is_set()
+    finally:
+        release.set()
+
+
+def test_either_policy_refused_with_exact_fingerprint_match():
+    with pytest.raises(ValueError):
+        check_policy("either")
+    with pytest.raises(ValueError):
+        evaluate("either", lambda: True, lambda: True)
+
+
+def test_either_policy_short_circuits_on_success(scored_fingerprints):
+    started, release = threading.Event(), threading.Event()
+    try:
+        passed, reason = evaluate("either", blocked(False, started, release), lambda: True)
+        assert passed is True
+        assert "fingerprint" in reason
+        assert not release.is_set()
+    finally:
+        release.set()
+
+
+def test_either_policy_all_failed(scored_fingerprints):
+    passed, _ = evaluate("either", lambda: False, lambda: False)
+    assert passed is False
+
+
+def test_factors_run_in_parallel_with_scored_matcher(scored_fingerprints):
+    face_started, fingerprint_started = threading.Event(), threading.Event()
+
+    # Каждый фактор успешен, только если второй стартовал, пока первый ещё работает
+    def face_check():
+        face_started.set()
+        return fingerprint_started.wait(5)
+
+    def fingerprint_check():
+        fingerprint_started.set()
+        return face_started.wait(5)
+
+    passed, _ = evaluate("both", face_check, fingerprint_check)
+    assert passed is True
+
+
+def test_face_only_ignores_fingerprint():
+    passed, _ = evaluate("face-only", lambda: True, lambda: False)
+    assert passed is True
+
+
+def test_check_exception_is_failure():
+    def broken():
+        raise RuntimeError("boom")
+    passed, _ = evaluate("face-only", broken)
+    assert passed is False
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        evaluate("any", lambda: True)
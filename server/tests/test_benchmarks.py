@@ -0,0 +1,25 @@
+import os
+import sys
+
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.bench_utils import find_regressions, save_baseline, load_baseline
+
+
+
+def test_find_regressions_over_threshold():
+    baseline = {"a": 1.0, "b": 1.0}
+    results = {"a": 1.1, "b": 1.5}
+    assert find_regressions(results, baseline, threshold=0.2) == [("b", 1.0, 1.5)]
+
+
+def test_find_regressions_ignores_new_entries():
+    assert find_regressions({"new": 5.0}, {}, threshold=0.2) == []
+
+
+def test_baseline_roundtrip(tmp_path):
+    path = str(tmp_path / "baseline.json")
+    assert load_baseline(path) == {}
+    save_baseline({"a": 0.5}, path)
+    assert load_baseline(path) == {"a": 0.5}
@@ -0,0 +1,151 @@
+import os
+import sys
+import time
+import numpy as np
+import cv2
+from unittest.mock import MagicMock, patch
+
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.frame_cache import FrameCache, perceptual_hash
+
+
+
+def encode_image_for_test(img):
+    _, buffer = cv2.imencode('.jpg', img)
+    return buffer.tobytes()
+
+
+def make_gradient_image(shift=0):
+    img = np.tile(np.arange(0, 200, 2, dtype=np.uint8), (100, 1))
+    img = np.dstack([img, img, img])
+    return np.clip(img.astype(np.int16) + shift, 0, 255).astype(np.uint8)
+
+
+
+def test_exact_duplicate_is_cached():
+    cache = FrameCache()
+    compute = MagicMock(return_value=np.array([0.1, 0.2]))
+
+    first = cache.get_or_compute(b"frame", compute)
+    second = cache.get_or_compute(b"frame", compute)
+
+    compute.assert_called_once_with(b"frame")
+    assert np.array_equal(first, second)
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["hit_rate"] == 0.5
+
+
+def test_no_face_result_is_cached():
+    cache = FrameCache()
+    compute = MagicMock(return_value=None)
+
+    assert cache.get_or_compute(b"frame", compute) is None
+    assert cache.get_or_compute(b"frame", compute) is None
+    compute.assert_called_once()
+
+
+def test_ttl_expiry():
+    cache = FrameCache(ttl=0.05)
+    compute = MagicMock(return_value=None)
+
+    cache.get_or_compute(b"frame", compute)
+    time.sleep(0.1)
+    cache.get_or_compute(b"frame", compute)
+
+    assert compute.call_count == 2
+
+
+def test_lru_eviction():
+    cache = FrameCache(max_size=2)
+    compute = MagicMock(return_value=None)
+
+    cache.get_or_compute(b"a", compute)
+    cache.get_or_compute(b"b", compute)
+    cache.get_or_compute(b"a", compute)
+    cache.get_or_compute(b"c", compute)
+    cache.get_or_compute(b"b", compute)
+
+    assert compute.call_count == 4
+    assert cache.stats()["size"] == 2
+
+
+def test_settings_change_invalidates():
+    cache = FrameCache(settings={"num_jitters": 1})
+    compute = MagicMock(return_value=None)
+
+    cache.get_or_compute(b"frame", compute, {"num_jitters": 1})
+    cache.get_or_compute(b"frame", compute, {"num_jitters": 2})
+
+    assert compute.call_count == 2
+
+
+def test_near_duplicate_hit_by_perceptual_hash():
+    cache = FrameCache(max_distance=4)
+    compute = MagicMock(return_value=np.array([0.1]))
+    frame = encode_image_for_test(make_gradient_image())
+    similar = encode_image_for_test(make_gradient_image(shift=3))
+    assert frame != similar
+
+    cache.get_or_compute(frame, compute, scope="user123")
+    cache.get_or_compute(similar, compute, scope="user123")
+
+    compute.assert_called_once()
+
+
+def test_near_duplicate_not_shared_between_users():
+    cache = FrameCache(max_distance=4)
+    compute = MagicMock(return_value=np.array([0.1]))
+    frame = encode_image_for_test(make_gradient_image())
+    similar = encode_image_for_test(make_gradient_image(shift=3))
+
+    cache.get_or_compute(frame, compute, scope="user123")
+    cache.get_or_compute(similar, compute, scope="intruder")
+
+    assert compute.call_count == 2
+
+
+def test_near_duplicate_requires_scope():
+    cache = FrameCache(max_distance=4)
+    compute = MagicMock(return_value=np.array([0.1]))
+    frame = encode_image_for_test(make_gradient_image())
+    similar = encode_image_for_test(make_gradient_image(shift=3))
+
+    cache.get_or_compute(frame, compute)
+    cache.get_or_compute(similar, compute)
+
+    assert compute.call_count == 2
+
+
+def test_perceptual_hash_invalid_data():
+    assert perceptual_hash(b"invalid_image_data") is None
+
+
+def test_exact_hit_skips_perceptual_hash():
+    cache = FrameCache(max_distance=4)
+    compute = MagicMock(return_value=None)
+    frame = encode_image_for_test(make_gradient_image())
+    cache.get_or_compute(frame, compute, scope="user123")
+
+    with patch('utils.frame_cache.perceptual_hash') as mock_phash:
+        cache.get_or_compute(frame, compute, scope="user123")
+
+    mock_phash.assert_not_called()
+    compute.assert_called_once()
+
+
+def test_result_computed_before_settings_change_not_cached():
+    cache = FrameCache(settings={"num_jitters": 1})
+
+    def compute_during_settings_change(data):
+        # Пока идёт распознавание, настройки модели меняются
+        cache.get_or_compute(b"other", lambda d: None, {"num_jitters": 2})
+        return np.array([0.1])
+
+    cache.get_or_compute(b"frame", compute_during_settings_change, {"num_jitters": 1})
+    compute = MagicMock(return_value=np.array([0.2]))
+    result = cache.get_or_compute(b"frame", compute, {"num_jitters": 2})
+
+    compute.assert_called_once()
+    assert np.array_equal(result, np.array([0.2]))
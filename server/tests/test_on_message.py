@@ -0,0 +1,64 @@
+import os
+import sys
+import json
+import base64
+import importlib
+import pytest
+from unittest.mock import patch, MagicMock
+
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+pytest.importorskip("flask")
+pytest.importorskip("paho.mqtt")
+pytest.importorskip("face_recognition")
+
+
+@pytest.fixture
+def server_app(tmp_path, monkeypatch):
+    # app при импорте создаёт database.db и пишет registered_faces/ в текущем каталоге
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("registered_faces", exist_ok=True)
+    return importlib.import_module("app")
+
+
+def make_msg(payload):
+    msg = MagicMock()
+    msg.topic = "auth/attempts"
+    msg.payload = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+    return msg
+
+
+def mock_user_row(mock_connect, row):
+    mock_conn = MagicMock()
+    mock_cursor = MagicMock()
+    mock_cursor.fetchone.return_value = row
+    mock_conn.cursor.return_value = mock_cursor
+    mock_connect.return_value = mock_conn
+
+
+
+def test_on_message_user_without_face_encoding(server_app):
+    with patch.object(server_app, "log_and_publish") as mock_log, \
+            patch.object(server_app, "get_face_encoding") as mock_get_encoding, \
+            patch.object(server_app.sqlite3, "connect") as mock_connect:
+        mock_user_row(mock_connect, {'face_encoding': None, 'fingerprint_template': None})
+        payload = {"user_id": "webuser", "photo": base64.b64encode(b"fake").decode()}
+        server_app.on_message(MagicMock(), None, make_msg(payload))
+
+    # Отказ фактора лица, а не «Ошибка обработки» от имени unknown
+    mock_get_encoding.assert_not_called()
+    args = mock_log.call_args[0]
+    assert args[1] == "webuser"
+    assert args[2] == "failed"
+
+
+def test_on_message_survives_slow_attempt_write_error(server_app):
+    client = MagicMock()
+    with patch.object(server_app.slow_attempts, "finish",
+                      side_effect=OSError("No space left on device")) as mock_finish, \
+            patch.object(server_app.sqlite3, "connect"):
+        server_app.on_message(client, None, make_msg(b"invalid json"))
+
+    mock_finish.assert_called_once()
+    client.publish.assert_called_with("auth/response", "failed")
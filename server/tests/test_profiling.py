@@ -0,0 +1,107 @@
+import os
+import sys
+import json
+import time
+import threading
+
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.profiling import SamplingProfiler, SlowAttemptRecorder
+
+
+
+def busy_wait(seconds):
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        pass
+
+
+def test_sampling_profiler_collects_collapsed_stacks():
+    profiler = SamplingProfiler(interval=0.001)
+    assert profiler.start(0.2) is True
+    assert profiler.start(0.2) is False
+    busy_wait(0.2)
+    while profiler.running:
+        time.sleep(0.01)
+
+    lines = profiler.collapsed().splitlines()
+    assert lines
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert any("busy_wait" in line for line in lines)
+
+
+def test_fast_attempt_not_recorded(tmp_path):
+    recorder = SlowAttemptRecorder(str(tmp_path), threshold=1.0)
+    trace = recorder.start()
+    trace.mark("parse")
+    assert recorder.finish(trace, b"frame", "user123") is None
+    assert os.listdir(tmp_path) == []
+
+
+def test_slow_attempt_recorded_with_stack(tmp_path):
+    recorder = SlowAttemptRecorder(str(tmp_path), threshold=0.05)
+    trace = recorder.start()
+    with trace.stage("face_encoding"):
+        busy_wait(0.2)
+    trace.mark("decision")
+    path = recorder.finish(trace, b"frame", "../user123")
+
+    assert os.path.dirname(path) == str(tmp_path)
+    with open(os.path.join(path, "frame.jpg"), "rb") as f:
+        assert f.read() == b"frame"
+    with open(os.path.join(path, "attempt.json")) as f:
+        attempt = json.load(f)
+    assert attempt["user_id"] == "../user123"
+    assert attempt["total_ms"] >= 50
+    assert attempt["timings_ms"]["face_encoding"] >= 50
+    assert "decision" in attempt["timings_ms"]
+    assert any("busy_wait" in stack for stack in attempt["stacks"].values())
+
+
+def test_slow_attempt_stacks_only_from_own_factor_threads(tmp_path):
+    recorder = SlowAttemptRecorder(str(tmp_path), threshold=0.05)
+    own_started, other_started, release = threading.Event(), threading.Event(), threading.Event()
+
+    def factor(trace, started, name):
+        with trace.stage(name):
+            started.set()
+            release.wait(5)
+
+    slow = recorder.start()
+    other = recorder.start()
+    own_thread = threading.Thread(target=factor, args=(slow, own_started, "face_encoding"), name="auth-factor_0")
+    other_thread = threading.Thread(target=factor, args=(other, other_started, "face_encoding"), name="auth-factor_1")
+    own_thread.start()
+    other_thread.start()
+    try:
+        assert own_started.wait(5) and other_started.wait(5)
+        busy_wait(0.2)
+    finally:
+        release.set()
+        own_thread.join()
+        other_thread.join()
+    path = recorder.finish(slow, b"frame", "user123")
+    recorder.finish(other)
+
+    with open(os.path.join(path, "attempt.json")) as f:
+        stacks = json.load(f)["stacks"]
+    assert "auth-factor_0" in stacks
+    assert "auth-factor_1" not in stacks
+
+
+def test_recorder_disabled_without_threshold(tmp_path):
+    recorder = SlowAttemptRecorder(str(tmp_path / "captures"), threshold=None)
+    trace = recorder.start()
+    with trace.stage("face_encoding"):
+        pass
+    assert recorder.finish(trace, b"frame", "user123") is None
+    assert not os.path.exists(tmp_path / "captures")
+
+
+def test_recorder_keeps_at_most_max_captures(tmp_path):
+    recorder = SlowAttemptRecorder(str(tmp_path), threshold=0, max_captures=2)
+    paths = [recorder.finish(recorder.start(), b"frame", f"user{i}") for i in range(4)]
+
+    assert sorted(os.listdir(tmp_path)) == sorted(os.path.basename(p) for p in paths[-2:])
@@ -0,0 +1,184 @@
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+RIGHTS_ENTRY = "entry"            # только вход
+RIGHTS_ENTRY_EXIT = "entry_exit"  # вход/выход
+
+# Журнал изменений читают все процессы (app.py, async_app.py, перезапуски), каждый
+# со своим курсором, поэтому записи удаляются только по возрасту
+CHANGES_RETENTION = 24 * 60 * 60
+
+
+def init_tables(c):
+    """Таблицы прав доступа, дверей и временных окон (вызывается из init_db)."""
+    c.execute('''CREATE TABLE IF NOT EXISTS doors (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        door_id TEXT UNIQUE NOT NULL,
+        name TEXT
+    )''')
+    c.execute('''CREATE TABLE IF NOT EXISTS access_rights (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id TEXT NOT NULL,
+        door_id TEXT NOT NULL,
+        rights TEXT NOT NULL DEFAULT 'entry',
+        UNIQUE (user_id, door_id)
+    )''')
+    # Окна: дни недели строкой цифр (0 — понедельник), время "ЧЧ:ММ"
+    c.execute('''CREATE TABLE IF NOT EXISTS access_windows (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        right_id INTEGER NOT NULL,
+        weekdays TEXT NOT NULL DEFAULT '0123456',
+        start_time TEXT NOT NULL DEFAULT '00:00',
+        end_time TEXT NOT NULL DEFAULT '23:59'
+    )''')
+    # Журнал изменений для инкрементальной перестройки индекса
+    c.execute('''CREATE TABLE IF NOT EXISTS access_changes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id TEXT,
+        door_id TEXT,
+        changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )''')
+    # При UPDATE перестраиваются и старый, и новый ключ, иначе перенесённое
+    # право осталось бы у прежнего пользователя/двери
+    for event, rows in (("INSERT", ("NEW",)), ("UPDATE", ("OLD", "NEW")), ("DELETE", ("OLD",))):
+        rights_log = "".join(
+            f"INSERT INTO access_changes (user_id, door_id) VALUES ({row}.user_id, {row}.door_id);"
+            for row in rows
+        )
+        windows_log = "".join(
+            f"INSERT INTO access_changes (user_id, door_id) "
+            f"SELECT user_id, door_id FROM access_rights WHERE id = {row}.right_id;"
+            for row in rows
+        )
+        c.execute(f'''CREATE TRIGGER IF NOT EXISTS access_rights_{event.lower()}
+            AFTER {event} ON access_rights BEGIN {rights_log} END''')
+        c.execute(f'''CREATE TRIGGER IF NOT EXISTS access_windows_{event.lower()}
+            AFTER {event} ON access_windows BEGIN {windows_log} END''')
+    # Изменение двери перестраивает все правила для неё
+    c.execute('''CREATE TRIGGER IF NOT EXISTS doors_insert
+        AFTER INSERT ON doors BEGIN
+            INSERT INTO access_changes (user_id, door_id) VALUES (NULL, NEW.door_id);
+        END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS doors_update
+        AFTER UPDATE ON doors BEGIN
+            INSERT INTO access_changes (user_id, door_id) VALUES (NULL, OLD.door_id);
+            INSERT INTO access_changes (user_id, door_id) VALUES (NULL, NEW.door_id);
+        END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS doors_delete
+        AFTER DELETE ON doors BEGIN
+            INSERT INTO access_changes (user_id, door_id) VALUES (NULL, OLD.door_id);
+        END''')
+
+
+def _minutes(hhmm):
+    hours, minutes = hhmm.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def _in_window(window, now):
+    weekdays, start, end = window
+    if now.weekday() not in weekdays:
+        return False
+    minute = now.hour * 60 + now.minute
+    if start <= end:
+        return start <= minute <= end
+    return minute >= start or minute <= end  # окно через полночь
+
+
+class AccessIndex:
+    """
+    Индекс прав в памяти: (user_id, door_id) -> (права, окна).
+
+    Проверка в authorize() — поиск в словаре. Изменения таблиц подтягиваются
+    из access_changes не чаще раза в refresh_interval секунд.
+    """
+
+    def __init__(self, db_path, refresh_interval=2.0):
+        self.db_path = db_path
+        self.refresh_interval = refresh_interval
+        self._index = {}
+        self._last_change = None
+        self._last_refresh = 0.0
+        self._lock = threading.Lock()
+
+    def _load(self, c, where="", params=()):
+        c.execute(f'''SELECT r.user_id, r.door_id, r.rights, w.weekdays, w.start_time, w.end_time
+                      FROM access_rights r
+                      JOIN doors d ON d.door_id = r.door_id
+                      LEFT JOIN access_windows w ON w.right_id = r.id {where}''', params)
+        entries = {}
+        for user_id, door_id, rights, weekdays, start_time, end_time in c.fetchall():
+            _, windows = entries.setdefault((user_id, door_id), (rights, []))
+            if weekdays is not None:
+                windows.append((frozenset(int(d) for d in weekdays), _minutes(start_time), _minutes(end_time)))
+        return {key: (rights, tuple(windows)) for key, (rights, windows) in entries.items()}
+
+    def rebuild(self):
+        """Полная перестройка индекса."""
+        with self._lock:
+            conn = sqlite3.connect(self.db_path)
+            c = conn.cursor()
+            c.execute("SELECT COALESCE(MAX(id), 0) FROM access_changes")
+            self._last_change = c.fetchone()[0]
+            self._index = self._load(c)
+            conn.close()
+            self._last_refresh = time.monotonic()
+
+    def refresh(self):
+        """Перестраивает только ключи, затронутые изменениями с прошлого раза."""
+        # Если с прошлого обновления прошло больше половины срока хранения журнала,
+        # часть изменений могла быть уже удалена — надёжнее перестроить всё
+        if self._last_change is None or time.monotonic() - self._last_refresh > CHANGES_RETENTION / 2:
+            self.rebuild()
+            return
+        with self._lock:
+            conn = sqlite3.connect(self.db_path)
+            c = conn.cursor()
+            c.execute("SELECT id, user_id, door_id FROM access_changes WHERE id > ? ORDER BY id",
+                      (self._last_change,))
+            changes = c.fetchall()
+            doors = {door_id for _, user_id, door_id in changes if user_id is None}
+            keys = {(user_id, door_id) for _, user_id, door_id in changes
+                    if user_id is not None and door_id not in doors}
+
+            updates = {}
+            for door_id in doors:
+                updates.update(self._load(c, "WHERE r.door_id = ?", (door_id,)))
+            for user_id, door_id in keys:
+                updates.update(self._load(c, "WHERE r.user_id = ? AND r.door_id = ?", (user_id, door_id)))
+            if changes:
+                # Журнал растёт только при изменениях — тогда же и чистим старые записи
+                c.execute("DELETE FROM access_changes WHERE changed_at < datetime('now', ?)",
+                          (f"-{CHANGES_RETENTION} seconds",))
+                conn.commit()
+            conn.close()
+
+            # Сначала обновляем, потом удаляем — authorize() без блокировки не видит «дыр»
+            removed = [key for key in keys if key not in updates]
+            if doors:
+                removed += [key for key in self._index if key[1] in doors and key not in updates]
+            self._index.update(updates)
+            for key in removed:
+                self._index.pop(key, None)
+            if changes:
+                self._last_change = changes[-1][0]
+            self._last_refresh = time.monotonic()
+
+    def refresh_if_stale(self):
+        if time.monotonic() - self._last_refresh >= self.refresh_interval or self._last_change is None:
+            self.refresh()
+
+    def authorize(self, user_id, door_id, direction=RIGHTS_ENTRY, now=None):
+        """True, если у пользователя есть право пройти через дверь в указанном направлении сейчас."""
+        entry = self._index.get((user_id, door_id))
+        if entry is None:
+            return False
+        rights, windows = entry
+        if direction != RIGHTS_ENTRY and rights != RIGHTS_ENTRY_EXIT:
+            return False
+        if not windows:
+            return True
+        now = now or datetime.now()
+        return any(_in_window(window, now) for window in windows)
@@ -0,0 +1,98 @@
+import hmac
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+# Политики многофакторной проверки (ТЗ, п. 3.3)
+POLICY_BOTH = "both"
+POLICY_EITHER = "either"
+POLICY_FACE_ONLY = "face-only"
+POLICIES = (POLICY_BOTH, POLICY_EITHER, POLICY_FACE_ONLY)
+
+# Шаблон отпечатка сравнивается побайтно: сервер лишь сверяет шаблон, который
+# датчик выгрузил из своей памяти после собственного совпадения (loadModel/getModel),
+# с шаблоном в БД. Это не биометрическое сравнение: такой шаблон можно повторить,
+# поэтому отпечаток допустим только в паре с лицом ("both"). Политика "either"
+# разрешается лишь при наличии матчера с оценкой сходства и порогом.
+FINGERPRINT_MATCH_SCORED = False
+
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="auth-factor")
+
+
+def check_policy(policy):
+    """Проверяет, что политика известна и применима с текущим сравнением отпечатков."""
+    if policy not in POLICIES:
+        raise ValueError(f"Неизвестная политика: {policy}")
+    if policy == POLICY_EITHER and not FINGERPRINT_MATCH_SCORED:
+        raise ValueError('Политика "either" недоступна: отпечаток сверяется только побайтно')
+
+
+def compare_fingerprints(known, unknown):
+    """Побайтная сверка шаблонов за постоянное время (см. FINGERPRINT_MATCH_SCORED)."""
+    if not known or not unknown:
+        return False
+    return hmac.compare_digest(bytes(known), bytes(unknown))
+
+
+def _run_check(check):
+    # Исключение внутри фактора считаем отказом этого фактора
+    try:
+        return bool(check())
+    except Exception as e:
+        print("Ошибка проверки фактора:", e)
+        return False
+
+
+def evaluate(policy, face_check, fingerprint_check=None):
+    """
+    Проверяет факторы и возвращает (решение, причина).
+
+    face_check и fingerprint_check — функции без аргументов, возвращающие True/False.
+    Пока отпечаток сверяется побайтно (микросекунды), он проверяется первым прямо
+    в вызывающем потоке, и при отказе распознавание лица не запускается вовсе.
+    С матчером с оценкой сходства (FINGERPRINT_MATCH_SCORED) факторы идут
+    параллельно: при "both" решение возвращается по первому отказу, при "either" —
+    по первому успеху. Уже запущенную проверку отменить нельзя — она доработает
+    в пуле, но на решение не повлияет.
+    """
+    check_policy(policy)
+
+    checks = {"face": face_check}
+    if policy != POLICY_FACE_ONLY:
+        if fingerprint_check is None:
+            if policy == POLICY_BOTH:
+                return False, "Отпечаток не передан"
+        else:
+            checks["fingerprint"] = fingerprint_check
+
+    if len(checks) == 1:
+        name, check = next(iter(checks.items()))
+        passed = _run_check(check)
+        return passed, f"{name}: {'совпадение' if passed else 'отказ'}"
+
+    if not FINGERPRINT_MATCH_SCORED:
+        # Сначала дешёвая побайтная сверка; лицо — только если отпечаток совпал ("both")
+        if not _run_check(checks["fingerprint"]):
+            return False, "fingerprint: отказ"
+        if not _run_check(checks["face"]):
+            return False, "face: отказ"
+        return True, "Оба фактора совпали"
+
+    futures = {_executor.submit(_run_check, check): name for name, check in checks.items()}
+    pending = set(futures)
+    results = {}
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            name = futures[future]
+            results[name] = future.result()
+            if policy == POLICY_BOTH and not results[name]:
+                for other in pending:
+                    other.cancel()
+                return False, f"{name}: отказ"
+            if policy == POLICY_EITHER and results[name]:
+                for other in pending:
+                    other.cancel()
+                return True, f"{name}: совпадение"
+
+    if policy == POLICY_BOTH:
+        return True, "Оба фактора совпали"
+    return False, "Ни один фактор не совпал"
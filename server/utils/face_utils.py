@@ -2,11 +2,14 @@ import cv2
 import face_recognition
 import numpy as np
 
+# Параметры построения кодировки; при их смене кэш кадров сбрасывается
+ENCODING_SETTINGS = {"num_jitters": 1, "model": "small"}
+
 def get_face_encoding(image_data):
     nparr = np.frombuffer(image_data, np.uint8)
     img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
     rgb_img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-    encodings = face_recognition.face_encodings(rgb_img)
+    encodings = face_recognition.face_encodings(rgb_img, **ENCODING_SETTINGS)
     return encodings[0] if len(encodings) > 0 else None
 
 def compare_faces(known, unknown, tolerance=0.6):
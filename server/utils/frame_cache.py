@@ -0,0 +1,122 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+# Маркер «в кэше нет записи» — None в кэше означает «лицо не найдено»
+MISS = object()
+
+
+def perceptual_hash(image_data):
+    """dHash 64 бита по уменьшенному ч/б кадру или None, если кадр не декодируется."""
+    nparr = np.frombuffer(image_data, np.uint8)
+    img = cv2.imdecode(nparr, cv2.IMREAD_REDUCED_GRAYSCALE_4)
+    if img is None:
+        return None
+    small = cv2.resize(img, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int("".join("1" if b else "0" for b in bits), 2)
+
+
+class FrameCache:
+    """
+    LRU-кэш результатов get_face_encoding с TTL.
+
+    Точные повторы ищутся по SHA-256 JPEG, почти одинаковые кадры — по dHash
+    (если max_distance задан). Хранится кодировка лица либо None («лица нет»).
+    Почти одинаковый кадр берётся только из записи с тем же scope (заявленный
+    user_id): фон у двери общий, и кадр другого человека может оказаться близким.
+    """
+
+    def __init__(self, max_size=256, ttl=5.0, max_distance=None, settings=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.max_distance = max_distance
+        self.settings = settings
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # sha256 -> (время, phash, scope, результат)
+        self._generation = 0  # растёт при каждом сбросе
+        self._lock = threading.Lock()
+
+    def _exact(self, key, now):
+        entry = self._entries.get(key)
+        if entry is not None:
+            if now - entry[0] <= self.ttl:
+                self._entries.move_to_end(key)
+                return entry[3]
+            del self._entries[key]
+        return MISS
+
+    def _similar(self, phash, scope, now):
+        for other_key, (created, other_phash, other_scope, result) in reversed(self._entries.items()):
+            if now - created > self.ttl or other_phash is None or other_scope != scope:
+                continue
+            if bin(phash ^ other_phash).count("1") <= self.max_distance:
+                self._entries.move_to_end(other_key)
+                return result
+        return MISS
+
+    def get_or_compute(self, image_data, compute, settings=None, scope=None):
+        """
+        Возвращает результат из кэша или вызывает compute(image_data) и сохраняет его.
+
+        Без scope поиск по dHash не выполняется — только точные повторы.
+        """
+        key = hashlib.sha256(image_data).hexdigest()
+
+        with self._lock:
+            if settings is not None and settings != self.settings:
+                self._reset(settings)
+            # Результат, посчитанный до сброса кэша, сохранять нельзя
+            generation = self._generation
+            result = self._exact(key, time.monotonic())
+            if result is not MISS:
+                self.hits += 1
+                return result
+
+        # dHash требует декодирования JPEG — только после промаха по точному ключу
+        phash = None
+        if self.max_distance is not None and scope is not None:
+            phash = perceptual_hash(image_data)
+
+        with self._lock:
+            if phash is not None and generation == self._generation:
+                result = self._similar(phash, scope, time.monotonic())
+                if result is not MISS:
+                    self.hits += 1
+                    return result
+            self.misses += 1
+
+        result = compute(image_data)
+
+        with self._lock:
+            if generation == self._generation:
+                self._entries[key] = (time.monotonic(), phash, scope, result)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return result
+
+    def _reset(self, settings):
+        self._entries.clear()
+        self.settings = settings
+        self._generation += 1
+
+    def invalidate(self, settings=None):
+        """Сбрасывает кэш, например после смены настроек модели."""
+        with self._lock:
+            self._reset(settings)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
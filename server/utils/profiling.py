@@ -0,0 +1,221 @@
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+def _collapse(frame):
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class SamplingProfiler:
+    """
+    Сэмплирующий профилировщик всех потоков процесса на заданное окно времени.
+
+    Результат — стеки в «свёрнутом» формате (flamegraph.pl, speedscope):
+    "поток;функция (файл:строка);... количество".
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self._samples = Counter()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.started_at = None
+        self.duration = 0
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, duration):
+        """Запускает сбор на duration секунд. False, если профилировщик уже работает."""
+        with self._lock:
+            if self.running:
+                return False
+            self._samples = Counter()
+            self.started_at = datetime.now()
+            self.duration = duration
+            self._thread = threading.Thread(target=self._run, args=(duration,), daemon=True,
+                                            name="sampling-profiler")
+            self._thread.start()
+            return True
+
+    def _run(self, duration):
+        own_id = threading.get_ident()
+        deadline = time.monotonic() + duration
+        while time.monotonic() < deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = _collapse(frame)
+                self._samples[f"{names.get(thread_id, thread_id)};{stack}"] += 1
+            time.sleep(self.interval)
+
+    def collapsed(self):
+        return "\n".join(f"{stack} {count}" for stack, count in self._samples.most_common())
+
+
+class AttemptTrace:
+    """Замеры одной попытки: последовательные этапы (mark) и вложенные (stage)."""
+
+    def __init__(self):
+        self.thread_id = threading.get_ident()
+        self.started = time.perf_counter()
+        self.timings = {}
+        self.stacks = None
+        self.threads = {self.thread_id}  # потоки, работающие на эту попытку сейчас
+        self._threads_lock = threading.Lock()
+        self._last = self.started
+
+    def mark(self, name):
+        now = time.perf_counter()
+        self.timings[name] = round((now - self._last) * 1000, 3)
+        self._last = now
+
+    @contextmanager
+    def stage(self, name):
+        """Замер этапа; поток этапа (например, проверки фактора) на это время привязан к попытке."""
+        thread_id = threading.get_ident()
+        with self._threads_lock:
+            own_thread = thread_id in self.threads
+            self.threads.add(thread_id)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = round((time.perf_counter() - start) * 1000, 3)
+            if not own_thread:
+                with self._threads_lock:
+                    self.threads.discard(thread_id)
+
+    def active_threads(self):
+        with self._threads_lock:
+            return set(self.threads)
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+
+class SlowAttemptRecorder:
+    """
+    Сохраняет кадр, замеры этапов и стеки попыток дольше threshold секунд.
+
+    Стеки снимает сторожевой поток в момент превышения порога — то есть там,
+    где попытка действительно «застряла». Кроме потока попытки сохраняются
+    стеки потоков, которые в этот момент выполняют её этапы (trace.stage).
+
+    threshold=None выключает запись. Хранится не больше max_captures снимков,
+    самые старые удаляются.
+    """
+
+    def __init__(self, directory, threshold, max_captures=50):
+        self.directory = directory
+        self.threshold = threshold
+        self.max_captures = max_captures
+        self._active = {}
+        self._lock = threading.Lock()
+        self._watchdog = None
+
+    def start(self):
+        trace = AttemptTrace()
+        if self.threshold is None:
+            return trace
+        with self._lock:
+            self._active[id(trace)] = trace
+            if self._watchdog is None:
+                self._watchdog = threading.Thread(target=self._watch, daemon=True, name="slow-attempts")
+                self._watchdog.start()
+        return trace
+
+    def _watch(self):
+        while True:
+            time.sleep(max(self.threshold / 4, 0.01))
+            with self._lock:
+                overdue = [t for t in self._active.values() if t.stacks is None and t.elapsed >= self.threshold]
+            if not overdue:
+                continue
+            frames = sys._current_frames()
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for trace in overdue:
+                threads = trace.active_threads()
+                trace.stacks = {
+                    names.get(thread_id, str(thread_id)): "".join(traceback.format_stack(frame))
+                    for thread_id, frame in frames.items()
+                    if thread_id in threads
+                }
+
+    def finish(self, trace, frame_data=None, user_id=None):
+        """Завершает попытку; возвращает путь к сохранённому снимку или None."""
+        if self.threshold is None:
+            return None
+        with self._lock:
+            self._active.pop(id(trace), None)
+        total = trace.elapsed
+        if total < self.threshold:
+            return None
+
+        name = f"{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}_{os.path.basename(str(user_id))}"
+        path = os.path.join(self.directory, name)
+        os.makedirs(path, exist_ok=True)
+        if frame_data:
+            with open(os.path.join(path, "frame.jpg"), "wb") as f:
+                f.write(frame_data)
+        with open(os.path.join(path, "attempt.json"), "w") as f:
+            json.dump({
+                "user_id": user_id,
+                "total_ms": round(total * 1000, 3),
+                "timings_ms": trace.timings,
+                "stacks": trace.stacks,
+            }, f, ensure_ascii=False, indent=2)
+        print(f"Медленная попытка {user_id}: {total * 1000:.0f} мс, сохранено в {path}")
+        self._rotate()
+        return path
+
+    def _rotate(self):
+        # Имена начинаются с метки времени — сортировка по имени даёт порядок записи
+        with self._lock:
+            captures = sorted(os.listdir(self.directory))
+            for name in captures[:max(len(captures) - self.max_captures, 0)]:
+                shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+
+
+def replay(path, runs=3):
+    """Повторно прогоняет сохранённый кадр через get_face_encoding и печатает время."""
+    from utils.face_utils import get_face_encoding
+
+    with open(os.path.join(path, "attempt.json"), "r") as f:
+        attempt = json.load(f)
+    with open(os.path.join(path, "frame.jpg"), "rb") as f:
+        frame_data = f.read()
+
+    print(f"Исходная попытка: {attempt['total_ms']} мс, этапы: {attempt['timings_ms']}")
+    for i in range(runs):
+        start = time.perf_counter()
+        encoding = get_face_encoding(frame_data)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"Прогон {i + 1}: {elapsed:.1f} мс, лицо {'найдено' if encoding is not None else 'не найдено'}")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 2:
+        print("Использование: python -m utils.profiling <каталог медленной попытки>")
+        sys.exit(1)
+    replay(sys.argv[1])